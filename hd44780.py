@@ -1,14 +1,76 @@
+import struct
 import utime
 from hd44780_4bit_driver import HD447804BitDriver
-from hd44780_4bit_payload import HD447804BitPayload
+
+try:
+    import micropython
+except ImportError:
+    # Not running on MicroPython, so there is no native code emitter and the
+    # decorators leave functions as they are.
+    class micropython:
+        @staticmethod
+        def native(function):
+            return function
+
+        @staticmethod
+        def viper(function):
+            return function
+
+    # Only used in viper type annotations, which MicroPython doesn't evaluate
+    ptr8 = None
+
+
+def _build_data_frames():
+    """
+    Build the frames that write each possible byte to the LCD's data register.
+
+    The four frames for a byte start at index 4 * byte: the E strobe for the
+    high nibble followed by the E strobe for the low nibble, all with RS set.
+    """
+    rs = HD447804BitDriver.RS
+    e = HD447804BitDriver.E
+    data_shift = HD447804BitDriver.DATA_SHIFT
+    frames = bytearray(4 * 256)
+    for byte in range(256):
+        high = (byte >> 4) << data_shift | rs
+        low = (byte & 0x0F) << data_shift | rs
+        frames[4 * byte : 4 * byte + 4] = bytes((high | e, high, low | e, low))
+    return bytes(frames)
+
+
+@micropython.viper
+def _pack_frames(frames: ptr8, data_frames: ptr8, text: ptr8, length: int, bits: int):
+    """
+    Copy the frames for each character of a buffer out of the data frame table.
+
+    The viper code emitter compiles the loop to machine code working on raw
+    bytes and integers, with no Python objects created per character.
+
+    :param frames: The buffer to pack the frames into, at least 4 * length long.
+    :param data_frames: The table built by `_build_data_frames`.
+    :param text: A bytes-like object of character codes.
+    :param length: The number of characters to pack.
+    :param bits: The driver's `frame_bits`, added to every frame.
+    """
+    i = 0
+    while i < length:
+        j = int(text[i]) << 2
+        k = i << 2
+        frames[k] = int(data_frames[j]) | bits
+        frames[k + 1] = int(data_frames[j + 1]) | bits
+        frames[k + 2] = int(data_frames[j + 2]) | bits
+        frames[k + 3] = int(data_frames[j + 3]) | bits
+        i += 1
 
 
 class HD44780:
     """
-    A class for interacting with HD44780 LCD drivers through a PCF8574 I/O expander.
+    A class for interacting with HD44780 LCD drivers over a 4-bit data bus.
 
     This class provides methods for writing characters and strings to the LCD,
-    clearing the display, and controlling the display properties.
+    clearing the display, and controlling the display properties. It talks to
+    the hardware through any `HD447804BitDriver`, such as `PCF8574`; the driver
+    owns everything outside the HD44780's own pins, like the backlight.
 
     Usage:
 
@@ -17,7 +79,7 @@ class HD44780:
     >>> lcd.clear()
     >>> lcd.write_string("Hello, world!")
 
-    :param pcf: An instance of the `PCF8574` class.
+    :param driver: An instance of a `HD447804BitDriver`, such as `PCF8574`.
     :param num_lines: The number of lines on the LCD.
     :param num_columns: The number of columns on the LCD.
     """
@@ -50,12 +112,28 @@ class HD44780:
     LCD_2_LINE = 0x08  # DB3: two line display
     LCD_5x10_DOTS = 0x04  # DB2: 5x10 dot character font
 
+    # Frames for writing each byte to the data register, see _build_data_frames
+    _DATA_FRAMES = _build_data_frames()
+
     def __init__(self, driver: HD447804BitDriver, num_lines: int, num_columns: int):
         self.driver = driver
         self.num_lines = min(num_lines, 4)
         self.num_columns = min(num_columns, 40)
         self.display_control = self.LCD_DISPLAY_CTRL | self.LCD_ON_DISPLAY
         self.entry_mode_set = self.LCD_ENTRY_MODE | self.LCD_ENTRY_INC
+        # DDRAM address of the first column of each line. Lines 1 & 3 add 0x40,
+        # lines 2 & 3 add the number of columns.
+        self._line_offsets = (
+            0x00,
+            0x40,
+            self.num_columns,
+            0x40 + self.num_columns,
+        )
+        # Reusable frame buffers for a single byte and for a full line, so that
+        # writing to the LCD does not allocate
+        self._tx = bytearray(4)
+        self._line_tx = bytearray(4 * self.num_columns)
+        self._cursor_line_tx = (self._tx, self._line_tx)
 
         self._initialize()
 
@@ -75,11 +153,14 @@ class HD44780:
         longer during the initialization process and we cannot check the busy flag
         during this time (as the interface is in the process of being set up).
 
-        The specific timing values come from the HD44780 datasheet and are based on
-        the worst-case times for each command.
+        The specific timing values come from the HD44780 datasheet. Only the first
+        two function set commands need the longer waits; every command after
+        that executes in ~37us, which is covered by a short delay or by the time
+        it takes to send the next command over I2C.
         """
-        # Wait for more than 40ms after power rises above 2.7V
-        utime.sleep_ms(50)
+        # Wait for more than 40ms after power rises above 2.7V. The time spent
+        # booting and setting up the I2C bus adds to this.
+        utime.sleep_ms(40)
 
         # Switch to 8-bit mode.
         # This is the first step of the initialization sequence.
@@ -96,14 +177,13 @@ class HD44780:
 
         # Repeat the function set command in 8-bit mode one more time.
         self._write_nibble(0x03)
-        # We can use a shorter delay here.
-        utime.sleep_ms(1)
+        # From here on, commands execute in ~37us.
+        utime.sleep_us(40)
 
         # Switch to 4-bit mode.
         # This is the second step of the initialization sequence.
         self._write_nibble(0x02)
-        # We can use a shorter delay here.
-        utime.sleep_ms(1)
+        utime.sleep_us(40)
 
         # Now that we're in 4-bit mode, we can set the number of display lines and
         # character font size with the function set command.
@@ -112,8 +192,6 @@ class HD44780:
         self._write_command(
             self.LCD_FUNCTION_SET | (self.LCD_2_LINE if self.num_lines > 1 else 0x00)
         )
-        # We can use a shorter delay here.
-        utime.sleep_ms(1)
 
         # Set the display control flags.
         # This command sets the display on/off, cursor on/off, and cursor blink on/off flags.
@@ -135,12 +213,11 @@ class HD44780:
 
         param nibble: The 4-bit nibble to write.
         """
-        payload = HD447804BitPayload(e=1, rs=0, rw=0, data=nibble)
-        self.driver.write(payload)
-        payload = HD447804BitPayload(e=0, rs=0, rw=0, data=nibble)
-        self.driver.write(payload)
+        frame = nibble << HD447804BitDriver.DATA_SHIFT | self.driver.frame_bits
+        self.driver.write_burst(bytearray((frame | HD447804BitDriver.E, frame)))
 
-    def _write_byte(self, byte: int, mode: str = "data"):
+    @micropython.native
+    def _write_byte(self, byte: int, rs: int):
         """
         Write a byte to the LCD.
 
@@ -159,52 +236,84 @@ class HD44780:
         is selected, allowing the user to send data to be displayed on the LCD.
 
         :param byte: The byte to write.
-        :param mode: The mode to write the byte in. Must be "data" or "command".
-        """
-        if mode == "data":
-            rs = 1
-        elif mode == "command":
-            rs = 0
-        else:
-            raise ValueError("mode must be 'data' or 'command'")
-
-        # Prepare high order bits and write them
-        high_nibble = byte >> 4
-        payload_high = HD447804BitPayload(e=1, rs=rs, rw=0, data=high_nibble)
-        self.driver.write(payload_high)
-        payload_high = HD447804BitPayload(e=0, rs=rs, rw=0, data=high_nibble)
-        self.driver.write(payload_high)
-
-        # Prepare low order bits and write them
-        low_nibble = byte & 0x0F
-        payload_low = HD447804BitPayload(e=1, rs=rs, rw=0, data=low_nibble)
-        self.driver.write(payload_low)
-        payload_low = HD447804BitPayload(e=0, rs=rs, rw=0, data=low_nibble)
-        self.driver.write(payload_low)
-
-        utime.sleep_us(50)  # data needs > 37us to settle
+        :param rs: The Register Select bit (0 for instructions, 1 for data).
+        """
+        self._pack_byte(self._tx, 0, byte, rs)
+        self.driver.write_burst(self._tx)
+
+    @micropython.native
+    def _pack_byte(self, buf: bytearray, offset: int, byte: int, rs: int):
+        """
+        Pack the four frames that transfer a byte over the 4-bit interface.
+
+        The high order bits are transferred before the low order bits, each with
+        an E strobe (E high, then E low) so the LCD latches the nibble. The
+        driver's `frame_bits` are added to every frame.
+
+        :param buf: The buffer to pack the frames into.
+        :param offset: The position in `buf` of the first frame.
+        :param byte: The byte to transfer.
+        :param rs: The Register Select bit (0 for instructions, 1 for data).
+        """
+        rs |= self.driver.frame_bits
+        high = (byte >> 4) << HD447804BitDriver.DATA_SHIFT | rs
+        low = (byte & 0x0F) << HD447804BitDriver.DATA_SHIFT | rs
+        struct.pack_into(
+            "BBBB",
+            buf,
+            offset,
+            high | HD447804BitDriver.E,
+            high,
+            low | HD447804BitDriver.E,
+            low,
+        )
 
     def _write_command(self, cmd: int):
         """
         Write a command to the LCD.
 
+        Most commands execute in ~37us, which is shorter than the time it takes
+        to send the next byte over I2C, so no delay is needed after them. Clear
+        Display and Return Home take up to 1.52ms, so we wait after those.
+
         :param cmd: The command to write.
         """
-        self._write_byte(cmd, mode="command")
+        self._write_byte(cmd, 0)
+        if cmd in (self.LCD_CLR, self.LCD_HOME):
+            utime.sleep_ms(2)
 
     def _write_data(self, data: int):
         """
         Write data to the LCD.
 
+        The frames are copied from the precomputed data frame table rather than
+        packed from the nibbles.
+
         :param data: The data to write.
         """
-        self._write_byte(data, mode="data")
+        tx = self._tx
+        data_frames = self._DATA_FRAMES
+        bits = self.driver.frame_bits
+        j = (data & 0xFF) << 2
+        tx[0] = data_frames[j] | bits
+        tx[1] = data_frames[j + 1] | bits
+        tx[2] = data_frames[j + 2] | bits
+        tx[3] = data_frames[j + 3] | bits
+        self.driver.write_burst(tx)
 
     def clear(self):
         """
         Clear the LCD display and move the cursor to the top left corner.
+
+        Clear Display also sets the DDRAM address to 0 and undoes any display
+        shift, so there is no need to follow it with Return Home.
         """
         self._write_command(self.LCD_CLR)
+
+    def home(self):
+        """
+        Move the cursor to the top left corner and undo any display shift.
+        """
         self._write_command(self.LCD_HOME)
 
     def write_char(self, char: str):
@@ -223,13 +332,145 @@ class HD44780:
         to fit on the current line. If the string is shorter than the number of
         columns, the rest of the line will be filled with spaces.
 
+        The whole line is sent to the driver as a single burst rather than one
+        write per character.
+
         :param text: The text to write.
         """
-        for i in range(self.num_columns):
-            if i < len(text):
-                self.write_char(text[i])
-            else:
-                self.write_char(" ")
+        self._pack_line(text)
+        self.driver.write_burst(self._line_tx)
+
+    def write_line_at(self, line: int, text: str):
+        """
+        Move the cursor to the start of a line and write a string of text there.
+
+        The text is clipped or padded to the line width as in `write_string`.
+        The Set DDRAM Address command and the text are handed to the driver
+        together, so they can share a single bus transaction.
+
+        :param line: The line number (0-based).
+        :param text: The text to write.
+        """
+        self._pack_cursor(line, 0)
+        self._pack_line(text)
+        self.driver.write_bursts(self._cursor_line_tx)
+
+    def write_span(self, line: int, column: int, text):
+        """
+        Move the cursor to a position and write a string of text there.
+
+        Unlike `write_line_at`, the text is not padded, so the rest of the line is
+        left as it is. Text that would run past the end of the line is clipped.
+        The Set DDRAM Address command and the text are handed to the driver
+        together, so they can share a single bus transaction.
+
+        The text can also be given as a bytes-like object of character codes,
+        which lets callers reuse a buffer instead of building a new string.
+
+        :param line: The line number (0-based).
+        :param column: The column number (0-based).
+        Nothing is written if the column is past the end of the line.
+
+        :param text: The text to write, as a str or a bytes-like object.
+        """
+        if column < 0:
+            raise ValueError("column must not be negative")
+        # The text is packed into the line buffer, which holds one line
+        limit = self.num_columns - column
+        if limit <= 0:
+            return
+        if len(text) > limit:
+            text = text[:limit]
+        if not text:
+            return
+        self._pack_cursor(line, column)
+        self._pack_text(text, self._line_tx)
+        if len(text) == self.num_columns:
+            self.driver.write_bursts(self._cursor_line_tx)
+        else:
+            self.driver.write_bursts(
+                (self._tx, memoryview(self._line_tx)[: 4 * len(text)])
+            )
+
+    def write_ddram(self, line: int, column: int, text):
+        """
+        Move the cursor to a position and write a string of text there, in a
+        single burst, without clipping it to the width of the display.
+
+        Each line has 40 DDRAM addresses, or 80 on a one line display, of which
+        only the first `num_columns` are visible until the display is shifted.
+        This writes to the rest of them too, e.g. to scroll text in with
+        `move_left`. The frames are packed into a new buffer, so this allocates.
+
+        :param line: The line number (0-based).
+        :param column: The column number (0-based).
+        :param text: The text to write, as a str or a bytes-like object.
+        """
+        if not text:
+            return
+        frames = bytearray(4 * len(text))
+        self._pack_cursor(line, column)
+        self._pack_text(text, frames)
+        self.driver.write_bursts((self._tx, frames))
+
+    def _pack_cursor(self, line: int, column: int):
+        """
+        Pack the frames for a Set DDRAM Address command into the byte buffer.
+
+        :param line: The line number (0-based).
+        :param column: The column number (0-based).
+        """
+        addr = (column & 0x3F) + self._line_offsets[line & 3]
+        self._pack_byte(self._tx, 0, self.LCD_SET_DDRAM_ADDR | addr, 0)
+
+    @micropython.native
+    def _pack_line(self, text: str):
+        """
+        Pack the frames for a line of text into the line buffer.
+
+        :param text: The text to pack.
+        """
+        # Clip and pad the text to the line width up front, rather than checking
+        # each column. MicroPython's str has no ljust, so pad by hand.
+        text = text[: self.num_columns]
+        text += " " * (self.num_columns - len(text))
+
+        self._pack_text(text, self._line_tx)
+
+    @micropython.native
+    def _pack_text(self, text, frames: bytearray):
+        """
+        Pack the frames for a string of text into the start of a buffer.
+
+        :param text: The text to pack, as a str or a bytes-like object of
+            character codes.
+        :param frames: The buffer to pack the frames into, at least four times
+            as long as the text.
+        """
+        if not isinstance(text, str):
+            _pack_frames(
+                frames,
+                self._DATA_FRAMES,
+                text,
+                len(text),
+                self.driver.frame_bits,
+            )
+            return
+
+        # The buffer behind a str holds UTF-8 rather than character codes, so
+        # strings are packed here instead, copying each character's frames out
+        # of the precomputed table.
+        data_frames = self._DATA_FRAMES
+        bits = self.driver.frame_bits
+        i = 0
+        for char in text:
+            # Like _write_data, only the low byte of a character is sent
+            j = (ord(char) & 0xFF) << 2
+            frames[i] = data_frames[j] | bits
+            frames[i + 1] = data_frames[j + 1] | bits
+            frames[i + 2] = data_frames[j + 2] | bits
+            frames[i + 3] = data_frames[j + 3] | bits
+            i += 4
 
     def set_cursor(self, line: int, column: int):
         """
@@ -247,69 +488,109 @@ class HD44780:
         :param cursor_x: The column number (0-based).
         :param cursor_y: The line number (0-based).
         """
-        addr = cursor_x & 0x3F
-        if cursor_y & 1:
-            addr += 0x40  # Lines 1 & 3 add 0x40
-        if cursor_y & 2:  # Lines 2 & 3 add number of columns
-            addr += self.num_columns
-        self._write_command(self.LCD_SET_DDRAM_ADDR | addr)
+        self._pack_cursor(cursor_y, cursor_x)
+        self.driver.write_burst(self._tx)
 
     def display_on(self):
         """
         Turn on (unblank) the LCD.
         """
-        self.display_control |= self.LCD_ON_DISPLAY
-        self._write_command(self.display_control)
+        self._set_display_control(self.display_control | self.LCD_ON_DISPLAY)
 
     def display_off(self):
         """
         Turn off (blank) the LCD.
         """
-        self.display_control &= ~self.LCD_ON_DISPLAY
-        self._write_command(self.display_control)
+        self._set_display_control(self.display_control & ~self.LCD_ON_DISPLAY)
 
     def cursor_on(self):
         """
         Make the cursor visible.
         """
-        self.display_control |= self.LCD_ON_CURSOR
-        self._write_command(self.display_control)
+        self._set_display_control(self.display_control | self.LCD_ON_CURSOR)
 
     def cursor_off(self):
         """
         Make the cursor invisible.
         """
-        self.display_control &= ~self.LCD_ON_CURSOR
-        self._write_command(self.display_control)
+        self._set_display_control(self.display_control & ~self.LCD_ON_CURSOR)
 
     def blink_on(self):
         """
         Turn on the cursor blink.
         """
-        self.display_control |= self.LCD_ON_BLINK
-        self._write_command(self.display_control)
+        self._set_display_control(self.display_control | self.LCD_ON_BLINK)
 
     def blink_off(self):
         """
         Turn off the cursor blink.
         """
-        self.display_control &= ~self.LCD_ON_BLINK
-        self._write_command(self.display_control)
+        self._set_display_control(self.display_control & ~self.LCD_ON_BLINK)
+
+    def set_display(
+        self, display: bool = None, cursor: bool = None, blink: bool = None
+    ):
+        """
+        Set the display, cursor, and cursor blink flags with a single command.
+
+        Flags that are left as None keep their current state.
+
+        :param display: True to turn on (unblank) the LCD, False to turn it off.
+        :param cursor: True to make the cursor visible, False to make it invisible.
+        :param blink: True to turn on the cursor blink, False to turn it off.
+        """
+        display_control = self.display_control
+        for flag, on in (
+            (self.LCD_ON_DISPLAY, display),
+            (self.LCD_ON_CURSOR, cursor),
+            (self.LCD_ON_BLINK, blink),
+        ):
+            if on is not None:
+                display_control = (
+                    display_control | flag if on else display_control & ~flag
+                )
+        self._set_display_control(display_control)
+
+    def _set_display_control(self, display_control: int):
+        """
+        Send the display control command, if it changes any of the flags.
 
-    def move_left(self):
+        :param display_control: The new display control command.
+        """
+        if display_control != self.display_control:
+            self.display_control = display_control
+            self._write_command(display_control)
+
+    def move_left(self, count: int = 1):
         """
         Shift the display to the left without changing the DDRAM content.
+
+        :param count: The number of positions to shift by. Defaults to 1.
         """
-        self._write_command(self.LCD_CURSOR_SHIFT | self.LCD_MOVE_DISP)
+        self._write_repeated_command(self.LCD_CURSOR_SHIFT | self.LCD_MOVE_DISP, count)
 
-    def move_right(self):
+    def move_right(self, count: int = 1):
         """
         Shift the display to the right without changing the DDRAM content.
+
+        :param count: The number of positions to shift by. Defaults to 1.
         """
-        self._write_command(
-            self.LCD_CURSOR_SHIFT | self.LCD_MOVE_DISP | self.LCD_MOVE_RIGHT
+        self._write_repeated_command(
+            self.LCD_CURSOR_SHIFT | self.LCD_MOVE_DISP | self.LCD_MOVE_RIGHT, count
         )
 
+    def _write_repeated_command(self, cmd: int, count: int):
+        """
+        Write the same command to the LCD several times in a single burst.
+
+        :param cmd: The command to write. Must not be one that needs a delay.
+        :param count: The number of times to write it.
+        """
+        if count <= 0:
+            return
+        self._pack_byte(self._tx, 0, cmd, 0)
+        self.driver.write_burst(self._tx * count if count > 1 else self._tx)
+
     def auto_scroll_on(self):
         """
         Enable automatic display shift after each character is written.
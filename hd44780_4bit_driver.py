@@ -1,10 +1,64 @@
-from hd44780_4bit_payload import HD447804BitPayload
+import utime
 
 
 class HD447804BitDriver:
     """
     An interface for controlling the HD44780 LCD controller through a 4-bit data bus.
+
+    Data is passed to the driver as frames: plain ints that pack the control
+    signals and the 4-bit data nibble, using the bit positions below.
+
+    `HD44780` only waits after the commands that take longer than ~37us to
+    execute, so the driver must leave at least that long between bytes (every
+    four frames). The default burst methods do this. Drivers that override
+    them must do it too, unless sending a byte over their bus already takes
+    that long, as it does over I2C.
     """
 
-    def write(self, payload: HD447804BitPayload):
+    # Time the HD44780 needs to execute most commands and data writes
+    BYTE_DELAY_US = 40
+
+    # Frame bit layout
+    RS = 0x01  # bit 0 - Register Select
+    RW = 0x02  # bit 1 - Read/Write
+    E = 0x04  # bit 2 - Enable
+    DATA_SHIFT = 4  # bits 4-7 - Data lines (DB4 to DB7)
+
+    # Bits the driver needs set in every frame, such as a backlight pin wired
+    # to bit 3. HD44780 adds them when it packs frames, so drivers can send
+    # bursts as they are.
+    frame_bits = 0
+
+    def write(self, frame: int):
         raise NotImplementedError
+
+    def write_burst(self, frames):
+        """
+        Write a sequence of frames in order.
+
+        Drivers that can send several frames in a single bus transaction should
+        override this method. The default implementation falls back to calling
+        `write` for each frame, waiting `BYTE_DELAY_US` after each byte.
+
+        The frames should already include `frame_bits`.
+
+        :param frames: A bytearray of frames.
+        """
+        write = self.write
+        for i in range(len(frames)):
+            write(frames[i])
+            if i & 3 == 3:
+                utime.sleep_us(self.BYTE_DELAY_US)
+
+    def write_bursts(self, bursts):
+        """
+        Write several sequences of frames back-to-back.
+
+        Drivers that can gather several buffers into a single bus transaction
+        should override this method. The default implementation falls back to
+        calling `write_burst` for each sequence.
+
+        :param bursts: A sequence of bytearrays of frames.
+        """
+        for frames in bursts:
+            self.write_burst(frames)
@@ -1,6 +1,29 @@
+from hd44780_4bit_driver import HD447804BitDriver
+
+
 class HD447804BitPayload:
+    """
+    The control signals and 4-bit data nibble of a frame, as named fields.
+
+    `HD44780` packs frames directly and never creates payloads; this class is
+    kept for code that prefers to build frames from named fields.
+
+    >>> driver.write(HD447804BitPayload(e=1, rs=0, rw=0, data=0x0F).pack())
+    """
+
     def __init__(self, e: int, rs: int, rw: int, data: int):
         self.e = e
         self.rs = rs
         self.rw = rw
         self.data = data
+
+    def pack(self) -> int:
+        """
+        Pack the payload into a frame for `HD447804BitDriver.write`.
+        """
+        return (
+            (HD447804BitDriver.E if self.e else 0)
+            | (HD447804BitDriver.RS if self.rs else 0)
+            | (HD447804BitDriver.RW if self.rw else 0)
+            | (self.data & 0x0F) << HD447804BitDriver.DATA_SHIFT
+        )
@@ -2,6 +2,9 @@ from hd44780 import HD44780
 from backlight_driver import BacklightDriver
 import utime
 
+# A line of spaces as wide as the widest HD44780 display
+_BLANK = " " * 40
+
 
 class LCD:
     """
@@ -14,7 +17,7 @@ class LCD:
 
     >>> lcd = LCD_Display(hd44780)
     >>> lcd.clear()
-    >>> lcd.write_line(0, "Hello, world!")
+    >>> lcd.write_line("Hello, world!", 0)
 
     :param hd44780: An instance of the `HD44780` class.
     """
@@ -22,6 +25,10 @@ class LCD:
     def __init__(self, hd44780: HD44780, backlight_driver: BacklightDriver):
         self.hd44780 = hd44780
         self.backlight_driver = backlight_driver
+        # The text last written to each line by `write_line`, or None if unknown
+        self._lines = [None] * 4
+        # The visible window of a marquee, reused for every step
+        self._marquee_buf = bytearray(hd44780.num_columns)
 
     def get_hd44780(self):
         """
@@ -36,6 +43,7 @@ class LCD:
         Clear the LCD display.
         """
         self.hd44780.clear()
+        self._lines = [_BLANK[: self.hd44780.num_columns]] * 4
 
     def reset_cursor(self, line: int = 0):
         """
@@ -53,11 +61,35 @@ class LCD:
         to fit on the line. If the string is shorter than the number of columns,
         the rest of the line will be filled with spaces.
 
+        The cursor move and the whole padded line are sent to the LCD together,
+        in a single I2C transaction with the `PCF8574` driver.
+
+        The text last written to each line is remembered, and only the columns
+        that changed are sent. Nothing is sent if the line is unchanged. Text
+        written through the underlying HD44780 instance is not tracked, so call
+        `clear` after doing so.
+
         :param text: The text to write.
         :param line: The line number (0-based).
         """
-        self.reset_cursor(line)
-        self.hd44780.write_string(text)
+        num_columns = self.hd44780.num_columns
+        text = text[:num_columns]
+        text += " " * (num_columns - len(text))
+
+        line &= 3
+        old = self._lines[line]
+        if old is None:
+            self.hd44780.write_line_at(line, text)
+        elif old != text:
+            # Only send the span between the first and last changed columns
+            first = 0
+            while text[first] == old[first]:
+                first += 1
+            last = num_columns - 1
+            while text[last] == old[last]:
+                last -= 1
+            self.hd44780.write_span(line, first, text[first : last + 1])
+        self._lines[line] = text
 
     def write_lines(self, text: str):
         """
@@ -83,9 +115,40 @@ class LCD:
             self.write_line(lines[1], 1)
         else:
             # If there is no second line, clear the second line on the LCD
-            self.write_line("", 1)
+            self.clear_eol(1)
 
-    def marquee_text(self, text: str, line: int = 0, delay: float = 0.2):
+    def clear_eol(self, line: int = 0, column: int = 0):
+        """
+        Clear a line from a column to the end of the line.
+
+        Only the columns that aren't already blank are sent, when the line's
+        contents are known from `write_line`.
+
+        :param line: The line number (0-based).
+        :param column: The column number (0-based) to clear from.
+        """
+        if column < 0:
+            raise ValueError("column must not be negative")
+        num_columns = self.hd44780.num_columns
+        if column >= num_columns:
+            return
+        line &= 3
+        old = self._lines[line]
+        if old is not None:
+            self.write_line(old[:column], line)
+        else:
+            self.hd44780.write_span(line, column, _BLANK[: num_columns - column])
+            if column == 0:
+                # The whole line is blank now, so it is known again
+                self._lines[line] = _BLANK[:num_columns]
+
+    def marquee_text(
+        self,
+        text: str,
+        line: int = 0,
+        delay: float = 0.2,
+        shift_display: bool = False,
+    ):
         """
         Display a line of text as a scrolling marquee on the LCD.
 
@@ -93,32 +156,117 @@ class LCD:
         scrolled from right to left by manually updating the visible portion of the text. After the text has
         completely disappeared, it will start again from the right.
 
+        With `shift_display`, the text is written to the line's DDRAM once and scrolled with the HD44780's own
+        display shift, which sends one command per step instead of a whole line. The display shift moves every
+        line at once, so other lines scroll along with the marquee until it finishes. This is only possible on
+        one and two line displays, and when the text fits in the line's DDRAM alongside a screen of padding;
+        otherwise the visible portion is rewritten as usual.
+
         :param text: The text to display.
         :param line: The line number (0-based) on which to display the marquee.
         :param delay: The delay, in seconds, between each step of the marquee. Default is 0.2 seconds.
+        :param shift_display: Scroll using the display shift, moving all lines. Default is False.
         """
-        # Pad the text with spaces on both sides equal to the width of the display
-        text = " " * self.hd44780.num_columns + text + " " * self.hd44780.num_columns
+        # The line's contents are no longer what write_line last wrote
+        self._lines[line & 3] = None
+
+        # Sleep for a whole number of microseconds, which is cheaper and more
+        # precise on MicroPython than sleeping for a float number of seconds
+        delay_us = int(delay * 1000000)
+
+        if shift_display and self._shift_marquee_text(text, line, delay_us):
+            return
+
+        # Bind everything the loop needs to locals, which MicroPython looks up
+        # much faster than attributes and globals
+        num_columns = self.hd44780.num_columns
+        write_span = self.hd44780.write_span
+        sleep_us = utime.sleep_us
+        window = self._marquee_buf
+
+        # Pad the text with spaces on both sides equal to the width of the display.
+        # It is converted to character codes once, so each step only copies into
+        # the reused window rather than slicing out a new string. This isn't
+        # text.encode(), which would turn characters from 0x80 up, like the
+        # degree sign 0xDF, into two UTF-8 bytes.
+        padding = b" " * num_columns
+        codes = bytes(ord(char) & 0xFF for char in text)
+        text = memoryview(padding + codes + padding)
 
         # Write the visible portion of the text string to the display and update it
-        for i in range(len(text) - self.hd44780.num_columns + 1):
-            self.reset_cursor(line)
-            self.hd44780.write_string(text[i : i + self.hd44780.num_columns])
-            utime.sleep(delay)
+        for i in range(len(text) - num_columns + 1):
+            window[:] = text[i : i + num_columns]
+            write_span(line, 0, window)
+            sleep_us(delay_us)
+
+    def _shift_marquee_text(self, text: str, line: int, delay_us: int):
+        """
+        Display a marquee by shifting the display, see `marquee_text`.
+
+        Returns False without writing anything if the marquee can't be scrolled
+        this way.
 
-    def scroll_content_off_screen(self, direction: str = "right", delay: float = 0.2):
+        :param text: The text to display.
+        :param line: The line number (0-based) on which to display the marquee.
+        :param delay_us: The delay, in microseconds, between each step of the marquee.
+        """
+        hd44780 = self.hd44780
+        # Each line has 40 DDRAM addresses, or 80 on a one line display, and the
+        # display shift wraps around within them
+        if hd44780.num_lines == 1:
+            line_length = 80
+        elif hd44780.num_lines == 2:
+            line_length = 40
+        else:
+            return False
+        if hd44780.num_columns + len(text) > line_length:
+            return False
+
+        # Fill the whole line: blanks under the visible window, the text just
+        # past its right edge, then blanks up to the end of the line
+        row = " " * hd44780.num_columns + text
+        row += " " * (line_length - len(row))
+        hd44780.write_ddram(line, 0, row)
+        utime.sleep_us(delay_us)
+
+        move_left = hd44780.move_left
+        sleep_us = utime.sleep_us
+        for _ in range(hd44780.num_columns + len(text)):
+            move_left()
+            sleep_us(delay_us)
+
+        # Undo the display shift; the visible part of the line is blank again
+        hd44780.home()
+        return True
+
+    def scroll_content_off_screen(self, left: bool = False, delay: float = 0.2):
         """
         Scroll the current display content off the LCD to the specified edge.
 
-        :param direction: The direction to which to exit the text. Can be 'left' or 'right'.
+        With no delay, there is nothing to see between the steps, so all of the
+        shift commands are sent to the LCD at once.
+
+        :param left: True to exit the text to the left, False to exit it to the right. Default is False.
         :param delay: The delay, in seconds, between each step of the scroll. Default is 0.2 seconds.
         """
-        for _ in range(self.hd44780.num_columns):
-            if direction == "left":
-                self.hd44780.move_left()
-            else:
-                self.hd44780.move_right()
-            utime.sleep(delay)
+        if isinstance(left, str):
+            # This used to be a "left"/"right" direction string, and any
+            # non-empty string would otherwise scroll to the left
+            raise TypeError("left must be True or False, not a direction string")
+        move = self.hd44780.move_left if left else self.hd44780.move_right
+
+        num_columns = self.hd44780.num_columns
+
+        # Whole microseconds, as in marquee_text
+        delay_us = int(delay * 1000000)
+        if delay_us <= 0:
+            move(num_columns)
+            return
+
+        sleep_us = utime.sleep_us
+        for _ in range(num_columns):
+            move()
+            sleep_us(delay_us)
 
     def display_on(self):
         """
@@ -156,6 +304,20 @@ class LCD:
         """
         self.hd44780.blink_off()
 
+    def set_display(
+        self, display: bool = None, cursor: bool = None, blink: bool = None
+    ):
+        """
+        Set the display, cursor, and cursor blink flags with a single command.
+
+        Flags that are left as None keep their current state.
+
+        :param display: True to turn on (unblank) the LCD, False to turn it off.
+        :param cursor: True to make the cursor visible, False to make it invisible.
+        :param blink: True to turn on the cursor blink, False to turn it off.
+        """
+        self.hd44780.set_display(display, cursor, blink)
+
     def backlight_on(self):
         """
         Turn on the LCD backlight.
@@ -4,8 +4,8 @@ from hd44780 import HD44780
 from lcd import LCD
 
 
-def main():
-    i2c = I2C(0, sda=Pin(0), scl=Pin(1), freq=400000)
+def main(i2c_freq: int = 400000):
+    i2c = I2C(0, sda=Pin(0), scl=Pin(1), freq=i2c_freq)
     pcf8574 = PCF8574(i2c)
     hd44780 = HD44780(pcf8574, num_lines=2, num_columns=16)
     lcd = LCD(hd44780, pcf8574)
@@ -0,0 +1,11 @@
+# Freeze the library into a MicroPython firmware build, e.g.
+#
+#   make -C ports/rp2 FROZEN_MANIFEST=/path/to/micropython_i2c_lcd/manifest.py
+#
+# To freeze it alongside the port's own modules, add `include("$(PORT_DIR)/boards/manifest.py")`.
+module("backlight_driver.py", opt=3)
+module("hd44780.py", opt=3)
+module("hd44780_4bit_driver.py", opt=3)
+module("hd44780_4bit_payload.py", opt=3)
+module("lcd.py", opt=3)
+module("pcf8574.py", opt=3)
@@ -1,8 +1,6 @@
 from machine import I2C
-from hd44780_4bit_payload import HD447804BitPayload
 from hd44780_4bit_driver import HD447804BitDriver
 from backlight_driver import BacklightDriver
-import utime
 
 
 class PCF8574(HD447804BitDriver, BacklightDriver):
@@ -10,16 +8,29 @@ class PCF8574(HD447804BitDriver, BacklightDriver):
     A class for controlling the HD44780 LCD controller through a PCF8574 I/O expander.
 
     This class implements the HD447804BitController interface, providing methods for
-    writing 4-bit payloads to the HD44780 LCD controller via the PCF8574.
+    writing 4-bit frames to the HD44780 LCD controller via the PCF8574.
 
     Usage:
 
     >>> i2c = I2C(0, sda=Pin(0), scl=Pin(1), freq=400000)
     >>> pcf = PCF8574(i2c)
-    >>> pcf.write(HD447804BitPayload(e=1, rs=0, rw=0, data=0x0F))
+    >>> pcf.write_burst(bytes((0xF4, 0xF0)))  # strobe 0x0F into the LCD
+
+    The LCD is usually limited by the I2C bus rather than the CPU, so the bus
+    frequency matters more than anything else for how fast it updates. The
+    PCF8574 is specified for 100kHz, but nearly every backpack runs reliably at
+    400kHz, which is the recommended setting. Some modules (usually with short
+    cables) will run at up to 1MHz, but characters are sent back-to-back in a
+    single transaction, and above ~400kHz they can arrive faster than the
+    HD44780's ~37us execution time. Use `probe_max_freq` to find the fastest
+    frequency a particular module responds correctly at.
 
     :param i2c: An instance of the `machine.I2C` class representing the I2C bus.
     :param address: The I2C address of the PCF8574. Defaults to 0x27.
+    :param freq: The I2C bus frequency to set, in Hz, at least 400kHz. Defaults
+        to None, which leaves the bus as it was configured. Not every port can
+        change the frequency of an existing hardware I2C bus (rp2 can't), so
+        there it's better to create the bus with the frequency instead.
     """
 
     # PCF8574 device address
@@ -33,63 +44,217 @@ class PCF8574(HD447804BitDriver, BacklightDriver):
 
     # PCF8574 <-> Backlight byte shift
     BACKLIGHT_SHIFT = 3  # P3 - Backlight control
+    BACKLIGHT_MASK = 1 << BACKLIGHT_SHIFT
+
+    # Slowest I2C bus frequency accepted by the constructor
+    MIN_FREQ = 400000
+
+    # I2C bus frequencies tried by probe_max_freq, slowest first. Faster ones can
+    # outrun the HD44780, see above, so they are only tried if asked for.
+    PROBE_FREQS = (100000, 400000)
 
-    def __init__(self, i2c: I2C, address: int = DEFAULT_ADDRESS):
+    def __init__(self, i2c: I2C, address: int = DEFAULT_ADDRESS, freq: int = None):
         self.i2c = i2c
         self.address = address
         self.backlight = 0  # backlight is initially off
+        self.frame_bits = 0  # backlight pin state, added to every frame
+        self._last_byte = None  # last byte written to P0-P7, if known
+        self._writevto = getattr(i2c, "writevto", None)  # not on every port
+        self._byte_buf = bytearray(1)  # reused by _write_byte
+        if freq is not None:
+            if freq < self.MIN_FREQ:
+                raise ValueError("freq must be at least 400kHz")
+            self._set_freq(freq)
+
+    def write(self, frame: int):
+        """
+        Write a 4-bit frame to the HD44780 LCD controller through the PCF8574.
+
+        The PCF8574 pins are wired in the same order as the bits of a
+        HD447804BitDriver frame, so the frame is sent as-is with the backlight
+        control pin added.
 
-    def write(self, payload: HD447804BitPayload):
+        :param frame: A frame as described by `HD447804BitDriver`.
         """
-        Write a 4-bit payload to the HD44780 LCD controller through the PCF8574.
+        self._write_byte(frame | self.frame_bits)
+
+    def write_burst(self, frames):
+        """
+        Write a sequence of 4-bit frames in a single I2C transaction.
+
+        The PCF8574 latches every byte it receives onto P0-P7, so the E strobe
+        edges for one or more nibbles can be sent back-to-back after a single
+        start/address sequence instead of one transaction per edge.
+
+        No delay is needed between or after bursts: each byte takes longer to
+        send than the HD44780 needs to execute a command, and the slow
+        commands are waited for by `HD44780`.
+
+        The frames are sent unchanged, so they set the backlight control pin
+        too. `HD44780` adds `frame_bits` to the frames it packs for this.
 
-        This method prepares a byte to be sent to the hardware, consisting of the
-        4-bit payload and control signals for the HD44780 LCD controller, and the
-        backlight control pin connected to the PCF8574. The byte is then sent to
-        the I2C interface.
+        :param frames: A bytes-like object of frames.
+        """
+        self._write_bytes(frames)
 
-        :param payload: An instance of the HD447804BitPayload class.
+    def write_bursts(self, bursts):
         """
+        Write several sequences of 4-bit frames in a single I2C transaction.
+
+        The buffers are gathered with `I2C.writevto` where the port supports it,
+        so they don't have to be joined into one buffer first.
 
-        byte = (
-            self.backlight << self.BACKLIGHT_SHIFT
-            | payload.e << self.ENABLE_SHIFT
-            | payload.rs << self.RS_SHIFT
-            | payload.rw << self.RW_SHIFT
-            | payload.data << self.DATA_SHIFT
-        )
-        self._write_byte(byte)
+        :param bursts: A sequence of bytes-like objects of frames.
+        """
+        self._write_vector(bursts)
 
     def backlight_on(self):
         """
         Turn the backlight on.
-
-        This method sets the backlight control pin connected to the PCF8574 to 1.
-        This does not effect the state of the HD44780 LCD controller because the
-        E pin is not set.
         """
-        self.backlight = 1
-        self._write_byte(self.backlight << self.BACKLIGHT_SHIFT)
+        self.set_backlight(True)
 
     def backlight_off(self):
         """
         Turn the backlight off.
+        """
+        self.set_backlight(False)
+
+    def set_backlight(self, on: bool):
+        """
+        Turn the backlight on or off.
+
+        This method sets the backlight control pin connected to the PCF8574.
+        The other pins keep the state of the last byte written, so the RS and
+        data lines don't change and the E pin stays low. This does not effect
+        the state of the HD44780 LCD controller.
+
+        :param on: True to turn the backlight on, False to turn it off.
+        """
+        self.backlight = 1 if on else 0
+        self.frame_bits = self.BACKLIGHT_MASK if on else 0
+        last_byte = self._last_byte or 0
+        self._write_byte(last_byte & ~self.BACKLIGHT_MASK | self.frame_bits)
+
+    def probe_max_freq(self, freqs=PROBE_FREQS):
+        """
+        Find the fastest I2C bus frequency at which the PCF8574 works reliably.
+
+        The frequencies are tried in order. At each one, the bus is reinitialized
+        and a few bytes are written to the PCF8574 and read back. Only the RS and
+        data lines are changed and the E pin stays low, so the HD44780 LCD
+        controller is not affected. Probing stops at the first frequency that
+        fails, and the bus is left at the fastest one that worked. If none of
+        them worked, the bus is left at the first one.
+
+        By default, frequencies above 400kHz aren't tried: a frequency that
+        works for the PCF8574 may still be too fast for the HD44780, see the
+        class documentation. Pass them in `freqs` to try them anyway.
+
+        The bus must support changing its frequency with `I2C.init`, which
+        `SoftI2C` does but some ports' hardware I2C doesn't. On those, this
+        raises ValueError before anything is written.
+
+        :param freqs: The frequencies to try, in Hz, slowest first.
+        :return: The fastest working frequency, or None if none of them worked.
+        """
+        last_byte = self._last_byte
+        # The pins no longer hold the last byte written once probing starts
+        self._last_byte = None
+
+        best = None
+        for freq in freqs:
+            self._set_freq(freq)
+            if not self._read_back_ok():
+                break
+            best = freq
+        if best is None:
+            return None
+        if best != freqs[-1]:
+            self._set_freq(best)
+
+        # Put the pins back as they were before probing
+        self._write_byte(self.frame_bits if last_byte is None else last_byte)
+        return best
+
+    def _read_back_ok(self):
+        """
+        Check that bytes written to the PCF8574 read back unchanged.
+
+        With RW low, the HD44780 doesn't drive the data lines, so the PCF8574's
+        quasi-bidirectional pins read back exactly what was written. The
+        backlight pin isn't compared, as it usually drives a transistor that
+        pulls it low while the backlight is on.
+        """
+        mask = ~self.BACKLIGHT_MASK & 0xFF
+        for pattern in (0xA0, 0x50, 0xF1, 0x00):
+            byte = pattern | self.frame_bits
+            try:
+                self.i2c.writeto(self.address, bytes((byte,)))
+                if (self.i2c.readfrom(self.address, 1)[0] ^ byte) & mask:
+                    return False
+            except OSError:
+                return False
+        return True
+
+    def _set_freq(self, freq: int):
+        """
+        Reconfigure the I2C bus to run at a frequency.
 
-        This method sets the backlight control pin connected to the PCF8574 to 0.
-        This does not effect the state of the HD44780 LCD controller because the
-        E pin is not set.
+        :param freq: The frequency, in Hz.
         """
-        self.backlight = 0
-        self._write_byte(self.backlight << self.BACKLIGHT_SHIFT)
+        try:
+            self.i2c.init(freq=freq)
+        except OSError:
+            # e.g. "I2C operation not supported" from rp2's hardware I2C
+            raise ValueError("can't change the frequency of this I2C bus")
 
     def _write_byte(self, byte: int):
         """
         Write a byte to the I2C bus.
 
         This method writes a byte to the I2C bus, using the address of the PCF8574.
+        The PCF8574 holds its outputs until the next write, so the write is
+        skipped if the byte matches the last one written.
 
         :param byte: The byte to write to the I2C bus.
         """
-        # print("Writing byte:  b'{:08b}'".format(byte & 0xFF))
-        utime.sleep_ms(1)
-        self.i2c.writeto(self.address, bytes([byte & 0xFF]))
+        byte &= 0xFF
+        if byte == self._last_byte:
+            return
+        # print("Writing byte:  b'{:08b}'".format(byte))
+        self._byte_buf[0] = byte
+        self.i2c.writeto(self.address, self._byte_buf)
+        self._last_byte = byte
+
+    def _write_bytes(self, buf):
+        """
+        Write a buffer of bytes to the I2C bus in a single transaction.
+
+        :param buf: The bytes to write to the I2C bus.
+        """
+        if not buf:
+            return
+        self.i2c.writeto(self.address, buf)
+        self._last_byte = buf[-1]
+
+    def _write_vector(self, bufs):
+        """
+        Write several buffers of bytes to the I2C bus in a single transaction.
+
+        :param bufs: A sequence of buffers to write to the I2C bus.
+        """
+        last_byte = None
+        for b in bufs:
+            if b:
+                last_byte = b[-1]
+        if last_byte is None:
+            return
+        if self._writevto is not None:
+            self._writevto(self.address, bufs)
+        else:
+            buf = bytearray()
+            for b in bufs:
+                buf.extend(b)
+            self.i2c.writeto(self.address, buf)
+        self._last_byte = last_byte
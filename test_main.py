@@ -32,8 +32,8 @@ def main_test():
         utime.sleep(2)
 
         print("Test moving the display content to the left and then to the right")
-        lcd.scroll_content_off_screen("left", 0.2)
-        lcd.scroll_content_off_screen("right", 0.2)
+        lcd.scroll_content_off_screen(True, 0.2)
+        lcd.scroll_content_off_screen(False, 0.2)
 
         print("Test blinking the cursor")
         lcd.reset_cursor(0)